@@ -36,7 +36,7 @@ for segment in segments:
     try:
         # Zvýšení timeoutu na 600 sekund (10 minut)
         upload_blob("ravineo-tv", str(path), segment["segment_file_path"], timeout=600)
-        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "uploaded"}})
+        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "uploaded"}, "$currentDate": {"updated_at": True}})
     except Exception as e:
         logger.error(f"Upload failed: {str(e)}")
         # Pokud chcete další diagnostické informace
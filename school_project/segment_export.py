@@ -0,0 +1,221 @@
+from pathlib import Path
+from urllib.parse import quote, unquote
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+import pyarrow as pa
+import pyarrow.compute as pc
+import logging
+import pymongo
+import json
+import os
+
+# Nastavení loggeru
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("segment_export")
+
+# Konstanty
+load_dotenv()
+MONGODB_URI = os.getenv('MONGODB_URI', "mongodb://localhost:27017/")
+MONGODB_DATABASE = os.getenv('MONGODB_DATABASE', "tv")
+EXPORT_DIR = os.getenv('EXPORT_DIR', "materials/analytics/segments")
+EXPORT_LAG_SECS = int(os.getenv('EXPORT_LAG_SECS', 600))  # sekundy
+WATERMARK_FILE = "_watermark.json"
+PARTITION_FILE = "segments.arrow"
+
+SCHEMA = pa.schema([
+    ("segment_id", pa.string()),
+    ("source", pa.string()),
+    ("start_at", pa.timestamp("ms")),
+    ("duration_secs", pa.float64()),
+    ("status", pa.string()),
+    ("fingerprint_id", pa.string()),
+])
+
+
+def read_watermark(export_dir: Path) -> datetime | None:
+    """Vrátí čas (naive UTC), do kterého jsou změny segmentů exportované, nebo None pokud export ještě neproběhl."""
+    watermark_path = export_dir / WATERMARK_FILE
+    if not watermark_path.exists():
+        return None
+    data = json.loads(watermark_path.read_text())
+    return datetime.fromisoformat(data["updated_before"])
+
+
+def write_watermark(export_dir: Path, updated_before: datetime) -> None:
+    """Atomicky zapíše watermark (přes dočasný soubor a rename)."""
+    watermark_path = export_dir / WATERMARK_FILE
+    tmp_path = watermark_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps({"updated_before": updated_before.isoformat()}))
+    tmp_path.replace(watermark_path)
+
+
+def partition_path(export_dir: Path, source: str, day: str) -> Path:
+    """
+    Cesta k partition ve tvaru source=<zdroj>/day=<YYYY-MM-DD>.
+    Zdroj je URL-enkódovaný, takže "/" ani ".." nemohou opustit adresář exportu.
+    """
+    return export_dir / f"source={quote(source, safe='')}" / f"day={day}"
+
+
+def write_partition(path: Path, rows: list[dict]) -> None:
+    """Přepíše partition jedním Arrow IPC souborem (lze ho číst přes memory map)."""
+    path.mkdir(parents=True, exist_ok=True)
+    table = pa.Table.from_pylist(rows, schema=SCHEMA)
+    output_path = path / PARTITION_FILE
+    tmp_path = output_path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table)
+    tmp_path.replace(output_path)
+
+
+def segment_to_row(segment: dict) -> dict:
+    # Starší záznamy nemusí mít duration_secs uložené
+    duration_secs = segment.get("duration_secs")
+    if duration_secs is None:
+        duration_secs = (segment["end_at"] - segment["start_at"]).total_seconds()
+
+    fingerprint_id = segment.get("fingerprint_id")
+    return {
+        "segment_id": str(segment["_id"]),
+        "source": segment["source"],
+        "start_at": segment["start_at"],
+        "duration_secs": duration_secs,
+        "status": segment.get("status"),
+        "fingerprint_id": str(fingerprint_id) if fingerprint_id is not None else None,
+    }
+
+
+def export_segments(db_client: pymongo.MongoClient, export_dir: str = EXPORT_DIR, lag_secs: int = EXPORT_LAG_SECS) -> int:
+    """
+    Inkrementálně exportuje segmenty z MongoDB do sloupcových souborů
+    rozdělených podle zdroje a dne.
+
+    Změněné segmenty se hledají podle pole updated_at, které nastavují
+    všechny kroky pipeline při změně statusu. Každý dotčený den se přepíše
+    celý jedním souborem, takže status odpovídá aktuálnímu stavu v databázi
+    a počet souborů nenarůstá. Watermark končí lag_secs před aktuálním časem,
+    aby se nepřeskočily zápisy s opožděným nebo posunutým časem klienta.
+    Opakovaný běh po pádu před zápisem watermarku přepíše tytéž soubory.
+
+    Args:
+        db_client: Připojení k MongoDB
+        export_dir: Kořenový adresář exportu
+        lag_secs: Bezpečnostní odstup watermarku od aktuálního času v sekundách
+
+    Returns:
+        Počet segmentů zapsaných do přepsaných partitions
+    """
+    export_path = Path(export_dir)
+    export_path.mkdir(parents=True, exist_ok=True)
+
+    mycol = db_client[MONGODB_DATABASE]["segments"]
+    projection = {"source": 1, "start_at": 1, "end_at": 1, "duration_secs": 1, "status": 1, "fingerprint_id": 1}
+
+    # pymongo vrací naive datetime v UTC, stejně tak počítáme watermark
+    updated_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=lag_secs)
+    updated_after = read_watermark(export_path)
+
+    # První export zahrne všechny segmenty, i ty bez updated_at
+    query = {"updated_at": {"$gt": updated_after, "$lte": updated_before}} if updated_after is not None else {}
+    changed_days = set()
+    for segment in mycol.find(query, {"source": 1, "start_at": 1}):
+        changed_days.add((segment["source"], segment["start_at"].date()))
+
+    exported = 0
+    for source, day in sorted(changed_days):
+        day_start = datetime.combine(day, datetime.min.time())
+        segments = mycol.find(
+            {"source": source, "start_at": {"$gte": day_start, "$lt": day_start + timedelta(days=1)}},
+            projection,
+        ).sort("start_at", pymongo.ASCENDING)
+        rows = [segment_to_row(segment) for segment in segments]
+
+        write_partition(partition_path(export_path, source, day.isoformat()), rows)
+        exported += len(rows)
+        logger.info(f"Exported {len(rows)} segments of {source} for {day.isoformat()}")
+
+    write_watermark(export_path, updated_before)
+    return exported
+
+
+def to_utc_naive(value: datetime | None) -> datetime | None:
+    """Převede datetime s časovou zónou na naive UTC, ve kterém jsou uložená data i partitions."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def load_segments(export_dir: str = EXPORT_DIR, sources: list[str] | None = None,
+                  start: datetime | None = None, end: datetime | None = None) -> pa.Table:
+    """
+    Načte exportované segmenty bez přístupu k MongoDB.
+
+    Soubory se mapují do paměti (memory map), partitions mimo zadané zdroje
+    a dny se vůbec neotevírají.
+
+    Args:
+        export_dir: Kořenový adresář exportu
+        sources: Omezení na vybrané zdroje (None = všechny)
+        start: Začátek intervalu (včetně), naive datetime se bere jako UTC
+        end: Konec intervalu (bez), naive datetime se bere jako UTC
+    """
+    export_path = Path(export_dir)
+    start = to_utc_naive(start)
+    end = to_utc_naive(end)
+    start_day = start.strftime('%Y-%m-%d') if start else None
+    end_day = end.strftime('%Y-%m-%d') if end else None
+
+    tables = []
+    for path in sorted(export_path.glob(f"source=*/day=*/{PARTITION_FILE}")):
+        source = unquote(path.parent.parent.name.removeprefix("source="))
+        day = path.parent.name.removeprefix("day=")
+        if sources is not None and source not in sources:
+            continue
+        if (start_day and day < start_day) or (end_day and day > end_day):
+            continue
+        with pa.memory_map(str(path), "r") as source_file:
+            tables.append(pa.ipc.open_file(source_file).read_all())
+
+    if not tables:
+        return SCHEMA.empty_table()
+
+    table = pa.concat_tables(tables)
+    if start is not None:
+        table = table.filter(pc.greater_equal(table["start_at"], pa.scalar(start, pa.timestamp("ms"))))
+    if end is not None:
+        table = table.filter(pc.less(table["start_at"], pa.scalar(end, pa.timestamp("ms"))))
+    return table
+
+
+def ad_minutes_per_hour(export_dir: str = EXPORT_DIR, sources: list[str] | None = None,
+                        start: datetime | None = None, end: datetime | None = None,
+                        statuses: list[str] | None = None) -> pa.Table:
+    """
+    Spočítá minuty reklam pro každý zdroj a hodinu (podle začátku segmentu).
+
+    Returns:
+        Tabulka se sloupci source, hour, ad_minutes, segments seřazená podle zdroje a hodiny
+    """
+    table = load_segments(export_dir, sources, start, end)
+    if statuses is not None:
+        table = table.filter(pc.is_in(table["status"], value_set=pa.array(statuses, pa.string())))
+
+    table = table.append_column("hour", pc.floor_temporal(table["start_at"], unit="hour"))
+    result = table.group_by(["source", "hour"]).aggregate([
+        ("duration_secs", "sum"),
+        ("duration_secs", "count"),
+    ])
+    result = pa.table({
+        "source": result["source"],
+        "hour": result["hour"],
+        "ad_minutes": pc.divide(result["duration_secs_sum"], 60.0),
+        "segments": result["duration_secs_count"],
+    })
+    return result.sort_by([("source", "ascending"), ("hour", "ascending")])
+
+
+if __name__ == "__main__":
+    myclient = pymongo.MongoClient(MONGODB_URI)
+    count = export_segments(myclient)
+    logger.info(f"Export finished, {count} segments written to {EXPORT_DIR}")
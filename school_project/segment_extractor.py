@@ -59,19 +59,19 @@ def cut_video_segments(video_path: str, segment: dict, db_client: pymongo.MongoC
             mydb = db_client["tv"]
             mycol = mydb["segments"]
             relative_path = Path(*output_path.parts[1:])
-            mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "saved", "segment_file_path": str(relative_path)}})
+            mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "saved", "segment_file_path": str(relative_path)}, "$currentDate": {"updated_at": True}})
 
         except subprocess.CalledProcessError as e:
             logger.error(f"Error cutting segment {segment["_id"]}: {e.stderr.decode()}")
             mydb = db_client["tv"]
             mycol = mydb["segments"]
-            mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "error"}})
+            mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "error"}, "$currentDate": {"updated_at": True}})
         
     except Exception as e:
         logger.error(f"Error processing video: {e}")
         mydb = db_client["tv"]
         mycol = mydb["segments"]
-        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "error"}})
+        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "error"}, "$currentDate": {"updated_at": True}})
 
 if __name__ == "__main__":
     myclient = pymongo.MongoClient("mongodb://localhost:27017/")
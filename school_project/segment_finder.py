@@ -2,7 +2,7 @@ import av
 import logging
 from pathlib import Path
 import pymongo
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 
 from school_project.detection import SilenceDetector, analyze_video_frame
 
@@ -137,6 +137,7 @@ def save_segment_to_db(record, start_time, end_time, db_client):
         "duration_secs": end_time - start_time,
 
         "status": "detected",
+        "updated_at": datetime.now(timezone.utc),
     }
     mycol.insert_one(segment_record)
 
@@ -6,9 +6,9 @@ def validate_segment_length(segment: dict) -> bool:
     # Round to 5 decimal places to handle floating point imprecision
     duration_rounded = round(segment["duration_secs"])
     if duration_rounded % 5 == 0:
-        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "approved"}})
+        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "approved"}, "$currentDate": {"updated_at": True}})
     else:
-        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "needs_review"}})
+        mycol.update_one({"_id": segment["_id"]}, {"$set": {"status": "needs_review"}, "$currentDate": {"updated_at": True}})
 
 if __name__ == "__main__":
     myclient = pymongo.MongoClient("mongodb://localhost:27017/")
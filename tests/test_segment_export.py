@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from school_project import segment_export
+
+
+def utc_now() -> datetime:
+    """Aktuální čas jako naive UTC s přesností na milisekundy (jako v MongoDB)."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+@pytest.fixture
+def db_client():
+    return mongomock.MongoClient()
+
+
+@pytest.fixture
+def segments(db_client):
+    return db_client[segment_export.MONGODB_DATABASE]["segments"]
+
+
+def insert_segment(segments, source="prima_cool", start_at=datetime(2025, 3, 1, 10, 5), duration_secs=30.0,
+                   status="detected", **fields):
+    segment = {
+        "source": source,
+        "start_at": start_at,
+        "end_at": start_at + timedelta(seconds=duration_secs),
+        "duration_secs": duration_secs,
+        "status": status,
+        "updated_at": utc_now() - timedelta(hours=1),
+    }
+    segment.update(fields)
+    return segments.insert_one(segment).inserted_id
+
+
+def partition_files(export_dir):
+    return sorted(str(path.relative_to(export_dir)) for path in export_dir.glob("source=*/day=*/*.arrow"))
+
+
+def test_second_run_exports_nothing_new(db_client, segments, tmp_path):
+    insert_segment(segments)
+    insert_segment(segments, start_at=datetime(2025, 3, 1, 11, 0))
+
+    assert segment_export.export_segments(db_client, str(tmp_path)) == 2
+    assert segment_export.export_segments(db_client, str(tmp_path)) == 0
+    assert segment_export.load_segments(str(tmp_path)).num_rows == 2
+
+
+def test_status_change_rewrites_partition(db_client, segments, tmp_path):
+    segment_id = insert_segment(segments)
+    segment_export.export_segments(db_client, str(tmp_path), lag_secs=0)
+
+    watermark = segment_export.read_watermark(tmp_path)
+    segments.update_one({"_id": segment_id}, {"$set": {"status": "approved", "updated_at": watermark + timedelta(milliseconds=1)}})
+    assert segment_export.export_segments(db_client, str(tmp_path), lag_secs=0) == 1
+
+    table = segment_export.load_segments(str(tmp_path))
+    assert table["status"].to_pylist() == ["approved"]
+    assert partition_files(tmp_path) == ["source=prima_cool/day=2025-03-01/segments.arrow"]
+
+
+def test_changes_within_lag_wait_for_next_run(db_client, segments, tmp_path):
+    insert_segment(segments)
+    segment_export.export_segments(db_client, str(tmp_path), lag_secs=600)
+
+    insert_segment(segments, start_at=datetime(2025, 3, 2, 8, 0), updated_at=utc_now())
+    assert segment_export.export_segments(db_client, str(tmp_path), lag_secs=600) == 0
+    assert segment_export.export_segments(db_client, str(tmp_path), lag_secs=0) == 1
+
+
+def test_rerun_after_crash_overwrites_partitions(db_client, segments, tmp_path, monkeypatch):
+    insert_segment(segments)
+    insert_segment(segments, start_at=datetime(2025, 3, 2, 9, 0))
+
+    def crash(*args):
+        raise RuntimeError("crash before watermark")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(segment_export, "write_watermark", crash)
+        with pytest.raises(RuntimeError):
+            segment_export.export_segments(db_client, str(tmp_path))
+    files_after_crash = partition_files(tmp_path)
+
+    assert segment_export.export_segments(db_client, str(tmp_path)) == 2
+    assert partition_files(tmp_path) == files_after_crash
+    assert segment_export.load_segments(str(tmp_path)).num_rows == 2
+
+
+def test_segments_around_midnight_go_to_their_start_day(db_client, segments, tmp_path):
+    insert_segment(segments, start_at=datetime(2025, 3, 1, 23, 59, 50), duration_secs=30.0)
+    insert_segment(segments, start_at=datetime(2025, 3, 2, 0, 0, 20))
+    segment_export.export_segments(db_client, str(tmp_path))
+
+    assert partition_files(tmp_path) == [
+        "source=prima_cool/day=2025-03-01/segments.arrow",
+        "source=prima_cool/day=2025-03-02/segments.arrow",
+    ]
+    day = segment_export.load_segments(str(tmp_path), start=datetime(2025, 3, 1), end=datetime(2025, 3, 2))
+    assert day["start_at"].to_pylist() == [datetime(2025, 3, 1, 23, 59, 50)]
+
+
+def test_start_end_and_source_filtering(db_client, segments, tmp_path):
+    insert_segment(segments, start_at=datetime(2025, 3, 1, 22, 30))
+    insert_segment(segments, start_at=datetime(2025, 3, 1, 23, 10))
+    insert_segment(segments, source="nova", start_at=datetime(2025, 3, 1, 23, 20))
+    segment_export.export_segments(db_client, str(tmp_path))
+
+    table = segment_export.load_segments(str(tmp_path), sources=["prima_cool"],
+                                         start=datetime(2025, 3, 1, 23), end=datetime(2025, 3, 2))
+    assert table["start_at"].to_pylist() == [datetime(2025, 3, 1, 23, 10)]
+
+    # 2025-03-02 00:00 UTC+2 je 2025-03-01 22:00 UTC
+    plus_two = timezone(timedelta(hours=2))
+    result = segment_export.ad_minutes_per_hour(str(tmp_path), start=datetime(2025, 3, 2, tzinfo=plus_two))
+    assert result.num_rows == 3
+
+
+def test_statuses_filtering(db_client, segments, tmp_path):
+    insert_segment(segments, duration_secs=30.0, status="approved")
+    insert_segment(segments, start_at=datetime(2025, 3, 1, 10, 30), duration_secs=15.0, status="needs_review")
+    insert_segment(segments, start_at=datetime(2025, 3, 1, 11, 30), duration_secs=60.0, status="approved")
+    segment_export.export_segments(db_client, str(tmp_path))
+
+    result = segment_export.ad_minutes_per_hour(str(tmp_path), statuses=["approved"])
+    assert result.to_pylist() == [
+        {"source": "prima_cool", "hour": datetime(2025, 3, 1, 10), "ad_minutes": 0.5, "segments": 1},
+        {"source": "prima_cool", "hour": datetime(2025, 3, 1, 11), "ad_minutes": 1.0, "segments": 1},
+    ]
+
+
+def test_empty_export_dir(tmp_path):
+    assert segment_export.load_segments(str(tmp_path)).num_rows == 0
+    assert segment_export.ad_minutes_per_hour(str(tmp_path)).num_rows == 0
+
+
+def test_missing_duration_falls_back_to_end_at(db_client, segments, tmp_path):
+    insert_segment(segments, duration_secs=42.0, fingerprint_id="fp-1")
+    segments.update_many({}, {"$unset": {"duration_secs": ""}})
+    segment_export.export_segments(db_client, str(tmp_path))
+
+    row = segment_export.load_segments(str(tmp_path)).to_pylist()[0]
+    assert row["duration_secs"] == 42.0
+    assert row["fingerprint_id"] == "fp-1"
+
+
+def test_source_is_encoded_in_path(db_client, segments, tmp_path):
+    insert_segment(segments, source="../a/b")
+    segment_export.export_segments(db_client, str(tmp_path))
+
+    assert partition_files(tmp_path) == ["source=..%2Fa%2Fb/day=2025-03-01/segments.arrow"]
+    assert segment_export.load_segments(str(tmp_path), sources=["../a/b"])["source"].to_pylist() == ["../a/b"]